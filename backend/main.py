@@ -4,14 +4,48 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from itertools import count
+from threading import Lock
+import asyncio
+import gzip
+import heapq
+import json
+import logging
+import os
+import uuid
 from fastapi.middleware.cors import CORSMiddleware
 
 SECRET_KEY = "supersecretkey"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+PREWARM_MINUTES = 5  # sınav penceresinden kaç dakika önce önbellekler ısıtılır
+RESULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+COMPACTION_INTERVAL_SECONDS = 3600
+ARCHIVE_CACHE_SIZE = 16  # bellekte tutulan çözülmüş arşiv dosyası sayısı
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arka plan görevleri: sınav zamanlayıcısı ve sonuç sıkıştırma
+    for exam in fake_exams:
+        exam_scheduler.schedule_exam(exam)
+    exam_scheduler.start()
+    compaction_task = asyncio.create_task(run_result_compaction())
+    try:
+        yield
+    finally:
+        compaction_task.cancel()
+        try:
+            await compaction_task
+        except asyncio.CancelledError:
+            pass
+        await exam_scheduler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -72,6 +106,7 @@ fake_users_db = {
         "grade": 10,
     }
 }
+users_lock = Lock()  # fake_users_db ve auth_cache birlikte değiştirilir
 
 def get_user(db, username: str):
     if username in db:
@@ -120,7 +155,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = get_user(fake_users_db, username=token_data.username)
+    with users_lock:
+        # Önbellek yalnızca modeli yeniden kurmamak içindir; kullanıcı veritabanında olmalı
+        if token_data.username not in fake_users_db:
+            raise credentials_exception
+        user = auth_cache.get(token_data.username) or get_user(fake_users_db, username=token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -148,6 +187,41 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 def read_root():
     return {"message": "Online Sınav Platformu Backend'e Hoşgeldiniz!"}
 
+# Değişiklik akışı: her yazma işlemi artan bir sürüm numarası alır ve
+# sıkıştırılmış günlüğe yazılır. Aynı kayda ait eski girişler silinir,
+# böylece günlükte her kayıt için yalnızca son durum (veya silme işareti) kalır.
+# Her türün kendi sınırı vardır; sınav sırasındaki yoğun sonuç akışı
+# sınav, kurs ve öğrenci girişlerini günlükten atamaz.
+CHANGE_TYPES = ("exams", "courses", "results", "students")
+CHANGE_LOG_LIMIT = 1000  # tür başına
+# Sürüm sayacı yalnızca bu süreçte yaşar; her açılışta yeni bir dönem kimliği üretilir ve
+# farklı dönemden gelen istemciler tam liste alır
+CHANGE_EPOCH = uuid.uuid4().hex
+
+change_lock = Lock()
+change_version = 0
+change_log_floors = {t: 0 for t in CHANGE_TYPES}  # bu sürümden eski istemciler o türün tam listesini alır
+change_logs = {t: OrderedDict() for t in CHANGE_TYPES}  # tür -> {anahtar: değişiklik}, sürüme göre sıralı
+
+def record_change(type_: str, key, data: Optional[dict] = None):
+    """Bir değişikliği günlüğe yazar; data None ise kayıt silinmiştir."""
+    global change_version
+    with change_lock:
+        change_version += 1
+        change_log = change_logs[type_]
+        change_log.pop(key, None)
+        change_log[key] = {
+            "version": change_version,
+            "type": type_,
+            "key": key,
+            "op": "delete" if data is None else "upsert",
+            "data": data,
+        }
+        while len(change_log) > CHANGE_LOG_LIMIT:
+            _, evicted = change_log.popitem(last=False)
+            change_log_floors[type_] = evicted["version"]
+        return change_version
+
 class Question(BaseModel):
     text: str
     options: list[str]
@@ -493,12 +567,25 @@ class Exam(BaseModel):
     course_id: int
     grade: int
     questions: list[Question]
+    open_at: Optional[datetime] = None  # UTC; boşsa sınav hemen açılır
+    close_at: Optional[datetime] = None  # UTC; boşsa sınav kapanmaz
+    duration: Optional[int] = None  # dakika; başlatılan denemenin süresi
 
 class Result(BaseModel):
     username: str
     exam_id: int
     score: int
     answers: Optional[list[int]] = None
+    auto_submitted: bool = False
+    submitted_at: Optional[datetime] = None  # UTC; dönem bu tarihten belirlenir
+
+# Başlatılmış, henüz teslim edilmemiş sınav denemesi
+class Attempt(BaseModel):
+    username: str
+    exam_id: int
+    started_at: datetime
+    deadline: Optional[datetime] = None
+    answers: list[int] = []
 
 fake_exams = [
     Exam(
@@ -527,11 +614,401 @@ fake_exams = [
     ),
 ]
 
-fake_results = [
+def term_of(dt: datetime):
+    # Eğitim-öğretim yılı Eylül'de başlar: 2024-10-01 -> "2024-2025"
+    start = dt.year if dt.month >= 9 else dt.year - 1
+    return f"{start}-{start + 1}"
+
+ARCHIVE_COLUMNS = ("exam_id", "score", "answers", "auto_submitted", "submitted_at")
+
+def load_archive(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+class ResultStore:
+    """Sınav sonuçları için iki katmanlı depo.
+
+    İçinde bulunulan dönemin sonuçları kullanıcı adına göre indekslenmiş
+    sıcak katmanda tutulur. compact() geçmiş dönemleri dönem başına
+    sıkıştırılmış, sütunlu ve salt okunur arşiv dosyalarına taşır;
+    query() iki katmanı birlikte okur. Bellekteki küçük manifest (dönem ->
+    dosya ve kullanıcı adları) sayesinde bir öğrencinin sorgusu yalnızca
+    onun sonucu bulunan dönem dosyalarını açar.
+
+    Arşiv dosyaları hiç değiştirilmez: bir dönem yeniden yazılırken yeni
+    nesil dosya ({dönem}.{nesil}.json.gz) oluşturulur ve manifest ile sıcak
+    katman aynı kilit altında birlikte güncellenir. Eski nesil dosya, onu
+    okuyan sorgular bitmiş olsun diye bir sonraki sıkıştırmada silinir.
+    """
+
+    def __init__(self, archive_dir: str, results: Optional[list[Result]] = None):
+        self.archive_dir = archive_dir
+        self._lock = Lock()
+        self._hot = []
+        self._by_user = {}  # username -> [Result]
+        self._cache = OrderedDict()  # dosya adı -> çözülmüş arşiv (LRU); dosyalar değişmez
+        os.makedirs(archive_dir, exist_ok=True)
+        self._archives = self._load_manifest()  # dönem -> (dosya adı, kullanıcılar)
+        for result in results or []:
+            self.add(result)
+
+    def add(self, result: Result):
+        with self._lock:
+            self._hot.append(result)
+            self._by_user.setdefault(result.username, []).append(result)
+
+    def hot_results(self, username: str):
+        """Kullanıcının yalnızca sıcak katmandaki (bu dönemki) sonuçları; disk okumaz."""
+        with self._lock:
+            return list(self._by_user.get(username, []))
+
+    def query(self, username: Optional[str] = None):
+        with self._lock:
+            files = [
+                name for _, (name, users) in sorted(self._archives.items())
+                if username is None or username in users
+            ]
+            hot = list(self._hot) if username is None else list(self._by_user.get(username, []))
+        archived = [r for name in files for r in self._read_archive(name, username)]
+        return archived + hot
+
+    def compact(self, now: Optional[datetime] = None):
+        """Geçmiş dönemlere ait sıcak sonuçları arşive taşır."""
+        current = term_of(now or datetime.utcnow())
+        self._remove_stale_files()
+        with self._lock:
+            by_term = {}
+            for r in self._hot:
+                # Tarihsiz (eski) kayıtlar dönemi bilinmediği için sıcak katmanda kalır
+                if r.submitted_at is not None and term_of(r.submitted_at) != current:
+                    by_term.setdefault(term_of(r.submitted_at), []).append(r)
+            archives = dict(self._archives)
+        for term, rows in sorted(by_term.items()):
+            previous = archives.get(term)
+            existing = self._read_archive(previous[0]) if previous else []
+            generation = int(previous[0].split(".")[1]) + 1 if previous else 1
+            name = self._write_archive(term, generation, existing + rows)
+            moved = {id(r) for r in rows}
+            # Yeni dosyanın yayımlanması ve sıcak katmandan silme tek adımdır;
+            # arada çalışan bir sorgu sonuçları iki kez göremez
+            with self._lock:
+                self._archives[term] = (name, frozenset(r.username for r in existing + rows))
+                self._hot = [r for r in self._hot if id(r) not in moved]
+                for r in rows:
+                    self._by_user[r.username] = [x for x in self._by_user[r.username] if id(x) not in moved]
+                    if not self._by_user[r.username]:
+                        del self._by_user[r.username]
+                self._save_manifest()
+        return sorted(by_term)
+
+    def _manifest_path(self):
+        return os.path.join(self.archive_dir, "manifest.json")
+
+    def _archive_files(self):
+        # {dönem}.{nesil}.json.gz -> (dönem, nesil)
+        files = {}
+        for name in os.listdir(self.archive_dir):
+            parts = name.split(".")
+            if len(parts) == 4 and parts[2:] == ["json", "gz"] and parts[1].isdigit():
+                files[name] = (parts[0], int(parts[1]))
+        return files
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        files = self._archive_files()
+        archives = {
+            term: (entry["file"], frozenset(entry["users"]))
+            for term, entry in manifest.items() if entry["file"] in files
+        }
+        # Manifestte olmayan dönemlerin en son nesli bir kez okunup manifeste eklenir
+        latest = {}
+        for name, (term, generation) in files.items():
+            if term not in archives and generation > latest.get(term, ("", -1))[1]:
+                latest[term] = (name, generation)
+        for term, (name, _) in latest.items():
+            archives[term] = (name, frozenset(load_archive(os.path.join(self.archive_dir, name))["usernames"]))
+        if latest:
+            self._archives = archives
+            self._save_manifest()
+        return archives
+
+    def _save_manifest(self):
+        path = self._manifest_path()
+        manifest = {term: {"file": name, "users": sorted(users)} for term, (name, users) in self._archives.items()}
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def _remove_stale_files(self):
+        with self._lock:
+            current = {name for name, _ in self._archives.values()}
+        for name in self._archive_files():
+            if name not in current:
+                with self._lock:
+                    self._cache.pop(name, None)
+                os.remove(os.path.join(self.archive_dir, name))
+
+    def _write_archive(self, term: str, generation: int, rows: list[Result]):
+        # Satırlar kullanıcıya göre gruplanır; index her kullanıcının [başlangıç, bitiş) aralığıdır
+        rows = sorted(rows, key=lambda r: r.username)
+        usernames = sorted({r.username for r in rows})
+        codes = {u: i for i, u in enumerate(usernames)}
+        index = {}
+        for i, r in enumerate(rows):
+            index.setdefault(r.username, [i, i])[1] = i + 1
+        data = {"term": term, "usernames": usernames, "index": index, "user": [codes[r.username] for r in rows]}
+        for col in ARCHIVE_COLUMNS:
+            data[col] = [getattr(r, col) for r in rows]
+        data["submitted_at"] = [d.isoformat() if d else None for d in data["submitted_at"]]
+        name = f"{term}.{generation}.json.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp = path + ".tmp"
+        # Yarıda kalmış önceki bir yazımdan kalan geçici dosya yeniden açılmadan önce silinir
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        os.chmod(path, 0o444)
+        return name
+
+    def _load_cached(self, name: str):
+        with self._lock:
+            data = self._cache.get(name)
+            if data is not None:
+                self._cache.move_to_end(name)
+                return data
+        # Disk okuması kilit dışında yapılır
+        data = load_archive(os.path.join(self.archive_dir, name))
+        with self._lock:
+            self._cache[name] = data
+            while len(self._cache) > ARCHIVE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return data
+
+    def _read_archive(self, name: str, username: Optional[str] = None):
+        data = self._load_cached(name)
+        if username is None:
+            rows = range(len(data["user"]))
+        elif username in data["index"]:
+            rows = range(*data["index"][username])
+        else:
+            return []
+        return [
+            Result(username=data["usernames"][data["user"][i]], **{col: data[col][i] for col in ARCHIVE_COLUMNS})
+            for i in rows
+        ]
+
+result_store = ResultStore(RESULT_ARCHIVE_DIR, [
     Result(username="student", exam_id=1, score=85, answers=[1,1]),
     Result(username="student", exam_id=2, score=90, answers=[0]),
     Result(username="student2", exam_id=3, score=75, answers=[0]),
-]
+])
+
+active_attempts = {}  # (username, exam_id) -> Attempt
+attempts_lock = Lock()  # olay döngüsü ve iş parçacığı havuzu denemeleri birlikte değiştirir
+
+# Sıcak yol önbellekleri; sınav penceresinden önce zamanlayıcı tarafından doldurulur
+exam_cache = {}  # exam_id -> serileştirilmiş sınav
+answer_key_cache = {}  # exam_id -> doğru şık listesi
+auth_cache = {}  # username -> UserInDB
+
+def utc_naive(dt: Optional[datetime]):
+    if dt is not None and dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def exam_status(exam: Exam, now: Optional[datetime] = None):
+    now = now or datetime.utcnow()
+    if exam.open_at and now < exam.open_at:
+        return "scheduled"
+    if exam.close_at and now >= exam.close_at:
+        return "closed"
+    return "open"
+
+def is_timed(exam: Exam):
+    # Süreli veya pencereli sınavlar yalnızca başlatılmış bir denemeyle teslim edilebilir
+    return bool(exam.duration or exam.open_at or exam.close_at)
+
+def find_exam(exam_id: int):
+    return next((e for e in fake_exams if e.id == exam_id), None)
+
+def serialize_exam(exam: Exam):
+    data = exam_cache.get(exam.id)
+    if data is None:
+        data = exam_cache[exam.id] = exam.model_dump(mode="json")
+    return data
+
+def public_exam(exam: Exam):
+    # Açılmamış sınavın soruları (ve cevap anahtarı) pencere başlayana kadar gizlenir
+    data = serialize_exam(exam)
+    if exam_status(exam) == "scheduled":
+        data = {**data, "questions": []}
+    return data
+
+def get_answer_key(exam: Exam):
+    key = answer_key_cache.get(exam.id)
+    if key is None:
+        key = answer_key_cache[exam.id] = [q.answer for q in exam.questions]
+    return key
+
+def prewarm_exam(exam: Exam):
+    serialize_exam(exam)
+    get_answer_key(exam)
+    with users_lock:
+        for username, u in fake_users_db.items():
+            if u["role"] == "student" and u["grade"] == exam.grade:
+                auth_cache[username] = UserInDB(**u)
+
+def invalidate_exam(exam_id: int):
+    exam_cache.pop(exam_id, None)
+    answer_key_cache.pop(exam_id, None)
+
+def submit_result(username: str, exam: Exam, answers: list[int], auto_submitted: bool = False):
+    key = get_answer_key(exam)
+    correct = sum(1 for i, a in enumerate(key) if i < len(answers) and answers[i] == a)
+    score = int(100 * correct / len(key))
+    result = Result(username=username, exam_id=exam.id, score=score, answers=answers,
+                    auto_submitted=auto_submitted, submitted_at=datetime.utcnow())
+    result_store.add(result)
+    data = result.model_dump(mode="json")
+    # İstemcinin de kullandığı doğal anahtar: kullanıcı, sınav ve teslim zamanı
+    record_change("results", f"{data['username']}:{data['exam_id']}:{data['submitted_at']}", data)
+    return result
+
+class ExamScheduler:
+    """Sınav pencerelerini min-heap üzerinde zamanlayan asyncio görevi.
+
+    Pencereden PREWARM_MINUTES önce önbellekleri ısıtır, sınavı zamanında
+    açıp kapatır ve süresi dolan denemeleri otomatik teslim eder.
+    """
+
+    def __init__(self):
+        self._heap = []  # (zaman, sıra, eylem, argümanlar)
+        self._seq = count()
+        self._lock = Lock()
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self._handlers = {
+            "prewarm": self._prewarm,
+            "open": self._open,
+            "close": self._close,
+            "expire": self._expire,
+        }
+
+    def schedule(self, when: datetime, action: str, *args):
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._seq), action, args))
+            loop, wakeup = self._loop, self._wakeup
+        # Uç noktalar iş parçacığı havuzunda çalıştığı için döngü güvenli şekilde uyandırılır
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # kapanış sırasında döngü kapanmış olabilir
+
+    def schedule_exam(self, exam: Exam):
+        now = datetime.utcnow()
+        if exam_status(exam, now) != "closed":
+            prewarm_at = exam.open_at - timedelta(minutes=PREWARM_MINUTES) if exam.open_at else now
+            self.schedule(max(prewarm_at, now), "prewarm", exam.id)
+        if exam.open_at and exam.open_at > now:
+            self.schedule(exam.open_at, "open", exam.id)
+        if exam.close_at and exam.close_at > now:
+            self.schedule(exam.close_at, "close", exam.id)
+
+    def schedule_attempt(self, attempt: Attempt):
+        if attempt.deadline:
+            self.schedule(attempt.deadline, "expire", attempt.username, attempt.exam_id)
+
+    def start(self):
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        with self._lock:
+            self._loop = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = datetime.utcnow()
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap))
+                delay = (self._heap[0][0] - now).total_seconds() if self._heap else None
+            for _, _, action, args in due:
+                try:
+                    self._handlers[action](*args)
+                except Exception:
+                    logger.exception("Zamanlanmış görev başarısız: %s %s", action, args)
+            if due:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _prewarm(self, exam_id: int):
+        exam = find_exam(exam_id)
+        if exam:
+            prewarm_exam(exam)
+
+    def _open(self, exam_id: int):
+        exam = find_exam(exam_id)
+        if exam:
+            prewarm_exam(exam)
+            record_change("exams", exam.id, serialize_exam(exam))
+
+    def _close(self, exam_id: int):
+        with attempts_lock:
+            keys = [k for k in active_attempts if k[1] == exam_id]
+        for username, attempt_exam_id in keys:
+            self._expire(username, attempt_exam_id)
+        exam = find_exam(exam_id)
+        if exam:
+            record_change("exams", exam.id, serialize_exam(exam))
+        invalidate_exam(exam_id)
+
+    def _expire(self, username: str, exam_id: int):
+        exam = find_exam(exam_id)
+        with attempts_lock:
+            attempt = active_attempts.get((username, exam_id))
+            # Aynı öğrenci yeni bir deneme başlattıysa eski zamanlayıcı yok sayılır
+            if attempt is None or (attempt.deadline and attempt.deadline > datetime.utcnow()):
+                return
+            del active_attempts[(username, exam_id)]
+            if exam:
+                submit_result(username, exam, attempt.answers, auto_submitted=True)
+
+exam_scheduler = ExamScheduler()
+
+async def run_result_compaction():
+    while True:
+        try:
+            terms = await asyncio.to_thread(result_store.compact)
+            if terms:
+                logger.info("Sonuçlar arşivlendi: %s", ", ".join(terms))
+        except Exception:
+            logger.exception("Sonuç sıkıştırma başarısız")
+        await asyncio.sleep(COMPACTION_INTERVAL_SECONDS)
 
 @app.get("/exams", response_model=List[Exam])
 def get_exams(course_id: int = None, grade: int = None):
@@ -540,33 +1017,99 @@ def get_exams(course_id: int = None, grade: int = None):
         exams = [e for e in exams if e.course_id == course_id]
     if grade is not None:
         exams = [e for e in exams if e.grade == grade]
-    return exams
+    return [public_exam(e) for e in exams]
 
 @app.get("/results", response_model=List[Result])
 def get_results(current_user: User = Depends(get_current_user)):
     if current_user.role == "admin":
-        return fake_results
-    return [r for r in fake_results if r.username == current_user.username]
+        return result_store.query()
+    return result_store.query(current_user.username)
 
 @app.post("/exams", response_model=Exam)
 def add_exam(exam: Exam, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Sadece admin sınav ekleyebilir.")
+    exam.open_at = utc_naive(exam.open_at)
+    exam.close_at = utc_naive(exam.close_at)
+    if exam.open_at and exam.close_at and exam.close_at <= exam.open_at:
+        raise HTTPException(status_code=400, detail="Sınav bitiş zamanı başlangıçtan sonra olmalı.")
+    if exam.duration is not None and exam.duration <= 0:
+        raise HTTPException(status_code=400, detail="Sınav süresi pozitif olmalı.")
+    # Önbellekler ve notlandırma sınav ID'sine göre çalışır
+    if find_exam(exam.id):
+        raise HTTPException(status_code=400, detail="Bu ID ile sınav zaten var")
     fake_exams.append(exam)
+    record_change("exams", exam.id, public_exam(exam))
+    exam_scheduler.schedule_exam(exam)
     return exam
 
+@app.get("/exams/{exam_id}", response_model=Exam)
+def get_exam(exam_id: int = Path(...)):
+    exam = find_exam(exam_id)
+    if not exam:
+        raise HTTPException(status_code=404, detail="Sınav bulunamadı.")
+    return public_exam(exam)
+
+@app.post("/exams/{exam_id}/start", response_model=Attempt)
+def start_exam(exam_id: int = Path(...), current_user: User = Depends(get_current_user)):
+    if current_user.role != "student":
+        raise HTTPException(status_code=403, detail="Sadece öğrenciler sınava girebilir.")
+    exam = find_exam(exam_id)
+    if not exam:
+        raise HTTPException(status_code=404, detail="Sınav bulunamadı.")
+    now = datetime.utcnow()
+    if exam_status(exam, now) != "open":
+        raise HTTPException(status_code=403, detail="Sınav şu anda açık değil.")
+    key = (current_user.username, exam_id)
+    with attempts_lock:
+        if key in active_attempts:
+            return active_attempts[key]
+        # Yeniden başlatarak sürenin sıfırlanması engellenir. Açık bir sınavın sonuçları
+        # bu döneme aittir; kilit altında arşiv okunmaması için yalnızca sıcak katmana bakılır
+        if any(r.exam_id == exam_id for r in result_store.hot_results(current_user.username)):
+            raise HTTPException(status_code=400, detail="Bu sınava zaten girdiniz.")
+        deadlines = [d for d in (exam.close_at, now + timedelta(minutes=exam.duration) if exam.duration else None) if d]
+        attempt = Attempt(username=current_user.username, exam_id=exam_id, started_at=now, deadline=min(deadlines) if deadlines else None)
+        active_attempts[key] = attempt
+    exam_scheduler.schedule_attempt(attempt)
+    return attempt
+
+@app.put("/exams/{exam_id}/answers", response_model=Attempt)
+def save_answers(exam_id: int = Path(...), answers: list[int] = Body(...), current_user: User = Depends(get_current_user)):
+    with attempts_lock:
+        attempt = active_attempts.get((current_user.username, exam_id))
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="Başlatılmış sınav bulunamadı.")
+        if attempt.deadline and datetime.utcnow() >= attempt.deadline:
+            raise HTTPException(status_code=403, detail="Sınav süresi doldu.")
+        attempt.answers = answers
+    return attempt
+
 @app.post("/take_exam", response_model=Result)
 def take_exam(exam_id: int = Body(...), answers: list[int] = Body(...), current_user: User = Depends(get_current_user)):
     if current_user.role != "student":
         raise HTTPException(status_code=403, detail="Sadece öğrenciler sınava girebilir.")
-    exam = next((e for e in fake_exams if e.id == exam_id), None)
+    exam = find_exam(exam_id)
     if not exam:
         raise HTTPException(status_code=404, detail="Sınav bulunamadı.")
-    correct = sum(1 for i, q in enumerate(exam.questions) if i < len(answers) and answers[i] == q.answer)
-    score = int(100 * correct / len(exam.questions))
-    result = Result(username=current_user.username, exam_id=exam_id, score=score, answers=answers)
-    fake_results.append(result)
-    return result
+    # Deneme alma, süre kontrolü ve teslim tek adımda yapılır; zamanlayıcı araya giremez
+    with attempts_lock:
+        attempt = active_attempts.pop((current_user.username, exam_id), None)
+        if attempt and attempt.deadline and datetime.utcnow() >= attempt.deadline:
+            # Zamanlayıcı henüz teslim etmediyse süre içinde kaydedilen cevaplar geçerlidir
+            return submit_result(current_user.username, exam, attempt.answers, auto_submitted=True)
+        if attempt is None:
+            if is_timed(exam):
+                # İstemci sayacı ile zamanlayıcı aynı anda tetiklenebilir; otomatik teslim
+                # edilmiş sonuç varsa hata yerine o döndürülür
+                submitted = [r for r in result_store.hot_results(current_user.username)
+                             if r.exam_id == exam_id and r.auto_submitted]
+                if submitted:
+                    return submitted[-1]
+                raise HTTPException(status_code=403, detail="Süreli sınav başlatılmadan teslim edilemez.")
+            if exam_status(exam) != "open":
+                raise HTTPException(status_code=403, detail="Sınav şu anda açık değil.")
+        return submit_result(current_user.username, exam, answers)
 
 # Kurs modeli
 class Course(BaseModel):
@@ -592,6 +1135,7 @@ def add_course(course: Course, current_user: User = Depends(get_current_user)):
     if any(c.id == course.id for c in fake_courses):
         raise HTTPException(status_code=400, detail="Bu ID ile kurs zaten var")
     fake_courses.append(course)
+    record_change("courses", course.id, course.model_dump(mode="json"))
     return course
 
 @app.put("/courses/{course_id}", response_model=Course)
@@ -601,6 +1145,9 @@ def update_course(course_id: int = Path(...), course: Course = Body(...), curren
     for idx, c in enumerate(fake_courses):
         if c.id == course_id:
             fake_courses[idx] = course
+            if course.id != course_id:
+                record_change("courses", course_id)
+            record_change("courses", course.id, course.model_dump(mode="json"))
             return course
     raise HTTPException(status_code=404, detail="Kurs bulunamadı")
 
@@ -611,6 +1158,7 @@ def delete_course(course_id: int = Path(...), current_user: User = Depends(get_c
     for idx, c in enumerate(fake_courses):
         if c.id == course_id:
             del fake_courses[idx]
+            record_change("courses", course_id)
             return {"detail": "Kurs silindi"}
     raise HTTPException(status_code=404, detail="Kurs bulunamadı")
 
@@ -632,50 +1180,63 @@ class StudentUpdate(BaseModel):
 def get_students(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Yetkisiz işlem")
-    return [User(**u) for u in fake_users_db.values() if u["role"] == "student"]
+    with users_lock:
+        return [User(**u) for u in fake_users_db.values() if u["role"] == "student"]
 
 @app.post("/students", response_model=User)
 def add_student(student: StudentCreate, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Yetkisiz işlem")
-    if student.username in fake_users_db:
-        raise HTTPException(status_code=400, detail="Bu kullanıcı adı zaten var")
-    fake_users_db[student.username] = {
-        "username": student.username,
-        "full_name": student.full_name,
-        "email": student.email,
-        "hashed_password": get_password_hash(student.password),
-        "disabled": False,
-        "role": "student",
-        "grade": student.grade,
-    }
-    return User(**fake_users_db[student.username])
+    hashed_pw = get_password_hash(student.password)
+    with users_lock:
+        if student.username in fake_users_db:
+            raise HTTPException(status_code=400, detail="Bu kullanıcı adı zaten var")
+        fake_users_db[student.username] = {
+            "username": student.username,
+            "full_name": student.full_name,
+            "email": student.email,
+            "hashed_password": hashed_pw,
+            "disabled": False,
+            "role": "student",
+            "grade": student.grade,
+        }
+        user = User(**fake_users_db[student.username])
+    record_change("students", user.username, user.model_dump(mode="json"))
+    return user
 
 @app.put("/students/{username}", response_model=User)
 def update_student(username: str, student: StudentUpdate, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Yetkisiz işlem")
-    if username not in fake_users_db or fake_users_db[username]["role"] != "student":
-        raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
-    if student.full_name is not None:
-        fake_users_db[username]["full_name"] = student.full_name
-    if student.email is not None:
-        fake_users_db[username]["email"] = student.email
-    if student.password is not None:
-        fake_users_db[username]["hashed_password"] = get_password_hash(student.password)
-    if student.disabled is not None:
-        fake_users_db[username]["disabled"] = student.disabled
-    if student.grade is not None:
-        fake_users_db[username]["grade"] = student.grade
-    return User(**fake_users_db[username])
+    hashed_pw = get_password_hash(student.password) if student.password is not None else None
+    with users_lock:
+        if username not in fake_users_db or fake_users_db[username]["role"] != "student":
+            raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
+        if student.full_name is not None:
+            fake_users_db[username]["full_name"] = student.full_name
+        if student.email is not None:
+            fake_users_db[username]["email"] = student.email
+        if hashed_pw is not None:
+            fake_users_db[username]["hashed_password"] = hashed_pw
+        if student.disabled is not None:
+            fake_users_db[username]["disabled"] = student.disabled
+        if student.grade is not None:
+            fake_users_db[username]["grade"] = student.grade
+        auth_cache.pop(username, None)
+        user = User(**fake_users_db[username])
+    record_change("students", username, user.model_dump(mode="json"))
+    return user
 
 @app.delete("/students/{username}")
 def delete_student(username: str, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Yetkisiz işlem")
-    if username not in fake_users_db or fake_users_db[username]["role"] != "student":
-        raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
-    del fake_users_db[username]
+    with users_lock:
+        if username not in fake_users_db or fake_users_db[username]["role"] != "student":
+            raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
+        del fake_users_db[username]
+        auth_cache.pop(username, None)
+    record_change("students", username)
     return {"detail": "Öğrenci silindi"}
 
 class RegisterRequest(BaseModel):
@@ -687,16 +1248,57 @@ class RegisterRequest(BaseModel):
 
 @app.post("/register")
 def register_student(data: RegisterRequest = Body(...)):
-    if data.username in fake_users_db:
-        raise HTTPException(status_code=400, detail="Kullanıcı adı zaten kayıtlı.")
     hashed_pw = get_password_hash(data.password)
-    fake_users_db[data.username] = {
-        "username": data.username,
-        "full_name": data.full_name,
-        "email": data.email,
-        "hashed_password": hashed_pw,
-        "role": "student",
-        "disabled": False,
-        "grade": data.grade,
+    with users_lock:
+        if data.username in fake_users_db:
+            raise HTTPException(status_code=400, detail="Kullanıcı adı zaten kayıtlı.")
+        fake_users_db[data.username] = {
+            "username": data.username,
+            "full_name": data.full_name,
+            "email": data.email,
+            "hashed_password": hashed_pw,
+            "role": "student",
+            "disabled": False,
+            "grade": data.grade,
+        }
+        user = {k: v for k, v in fake_users_db[data.username].items() if k != "hashed_password"}
+    record_change("students", data.username, User(**user).model_dump(mode="json"))
+    return user
+
+@app.get("/changes")
+def get_changes(since: Optional[int] = None, epoch: Optional[str] = None, types: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    requested = CHANGE_TYPES if not types else [t.strip() for t in types.split(",") if t.strip()]
+    unknown = [t for t in requested if t not in CHANGE_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen değişiklik türü: {', '.join(unknown)}")
+    # Öğrenci listesi yalnızca admin içindir
+    if current_user.role != "admin":
+        requested = [t for t in requested if t != "students"]
+    with change_lock:
+        version = change_version
+        # Sunucu yeniden başladıysa bütün türler, günlüğün gerisinde kalınan türler ise
+        # tek tek tam liste olarak döner; diğer türler için yalnızca farklar gönderilir
+        restarted = since is None or epoch != CHANGE_EPOCH or since > version
+        stale = [t for t in requested if restarted or since < change_log_floors[t]]
+        changes = [
+            c for t in requested if t not in stale for c in change_logs[t].values()
+            if c["version"] > since
+            and (t != "results" or current_user.role == "admin"
+                 or (c["data"] or {}).get("username") == current_user.username)
+        ]
+    changes.sort(key=lambda c: c["version"])
+    # Tam liste kilit dışında hazırlanır (arşiv okuması yazma işlemlerini bekletmesin).
+    # Sürüm önce alındığından arada yapılan değişiklikler bir sonraki istekte tekrar gelebilir.
+    snapshot = {
+        "exams": get_exams,
+        "courses": lambda: [c.model_dump(mode="json") for c in get_courses()],
+        "results": lambda: [r.model_dump(mode="json") for r in get_results(current_user)],
+        "students": lambda: [u.model_dump(mode="json") for u in get_students(current_user)],
+    }
+    return {
+        "epoch": CHANGE_EPOCH,
+        "version": version,
+        "snapshot": bool(stale),
+        "data": {t: snapshot[t]() for t in stale},
+        "changes": changes,
     }
-    return {k: v for k, v in fake_users_db[data.username].items() if k != "hashed_password"} 
\ No newline at end of file
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { TextField, Button, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, IconButton, Dialog, DialogTitle, DialogContent, DialogActions, Box, Typography } from "@mui/material";
 import { Add, Edit, Delete } from "@mui/icons-material";
+import useChanges from "./useChanges";
 
 function Courses({ user }) {
   const [courses, setCourses] = useState([]);
@@ -14,13 +15,11 @@ function Courses({ user }) {
   const courseIllustration = "https://undraw.co/api/illustrations/teaching.svg";
   const coursePhoto = "https://images.unsplash.com/photo-1461749280684-dccba630e2f6?auto=format&fit=crop&w=600&q=80";
 
+  const syncChanges = useChanges(token, { courses: setCourses });
+
   useEffect(() => {
-    fetch("http://localhost:8000/courses", {
-      headers: { Authorization: `Bearer ${token}` },
-    })
-      .then((res) => res.json())
-      .then(setCourses);
-  }, [token]);
+    syncChanges();
+  }, [syncChanges]);
 
   const handleOpen = (course = null) => {
     setEditCourse(course);
@@ -51,12 +50,8 @@ function Courses({ user }) {
         if (!res.ok) return res.json().then((d) => Promise.reject(d.detail || "Hata"));
         return res.json();
       })
-      .then((course) => {
-        if (editCourse) {
-          setCourses((prev) => prev.map((c) => (c.id === course.id ? course : c)));
-        } else {
-          setCourses((prev) => [...prev, course]);
-        }
+      .then(() => {
+        syncChanges();
         handleClose();
       })
       .catch(setError);
@@ -70,7 +65,7 @@ function Courses({ user }) {
     })
       .then((res) => {
         if (!res.ok) return res.json().then((d) => Promise.reject(d.detail || "Hata"));
-        setCourses((prev) => prev.filter((c) => c.id !== id));
+        syncChanges();
       })
       .catch(setError);
   };
@@ -2,6 +2,7 @@ import React, { useEffect, useState, useRef } from "react";
 import { Box, Typography, Card, CardContent, CardActions, Button, TextField, Grid, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Snackbar, Alert, Dialog, DialogTitle, DialogContent, DialogActions, RadioGroup, FormControlLabel, Radio, IconButton, LinearProgress } from '@mui/material';
 import AddCircleOutlineIcon from '@mui/icons-material/AddCircleOutline';
 import { Add, Edit, Delete } from "@mui/icons-material";
+import useChanges from "./useChanges";
 
 const EXAMPLE_QUESTIONS = {
   Matematik: [
@@ -49,36 +50,18 @@ function Exams({ user }) {
   const [examResult, setExamResult] = useState(null);
   const [currentQ, setCurrentQ] = useState(0);
   const [timeLeft, setTimeLeft] = useState(EXAM_DURATION);
+  const [totalTime, setTotalTime] = useState(EXAM_DURATION);
   const timerRef = useRef();
   const [selectedCourse, setSelectedCourse] = useState("");
   const [selectedGrade, setSelectedGrade] = useState("");
 
-  const fetchData = async () => {
-    setLoading(true);
-    const examsRes = await fetch("http://localhost:8000/exams");
-    const examsData = await examsRes.json();
-    setExams(examsData);
-    const resultsRes = await fetch("http://localhost:8000/results", {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-    const resultsData = await resultsRes.json();
-    setResults(resultsData);
-    setLoading(false);
-  };
+  // Sınavlar, sonuçlar ve kurslar; ilk çağrıda tam liste, sonra yalnızca farklar
+  const syncChanges = useChanges(token, { exams: setExams, results: setResults, courses: setCourses });
 
   useEffect(() => {
-    fetchData();
-    // eslint-disable-next-line
-  }, []);
-
-  // Kursları çek
-  useEffect(() => {
-    fetch("http://localhost:8000/courses", {
-      headers: { Authorization: `Bearer ${token}` },
-    })
-      .then((res) => res.json())
-      .then(setCourses);
-  }, [token]);
+    setLoading(true);
+    syncChanges().finally(() => setLoading(false));
+  }, [syncChanges]);
 
   // Kurs seçilince örnek soruları getir
   const handleCourseChange = (e) => {
@@ -124,16 +107,45 @@ function Exams({ user }) {
     setMessage("Sınav eklendi!");
     setOpen(true);
     setNewExam({ title: "", description: "", course_id: "", grade: "", questions: [] });
-    fetchData();
+    syncChanges();
   };
 
+  // Süreli (pencereli) sınavlar sunucuda deneme başlatılarak açılır
+  const isTimed = (exam) => Boolean(exam.duration || exam.open_at || exam.close_at);
+
   // Sınav çözme modalı açılırken sayaç başlat
-  const handleOpenExam = (exam) => {
+  const handleOpenExam = async (exam) => {
+    let duration = EXAM_DURATION;
+    if (isTimed(exam)) {
+      const res = await fetch(`http://localhost:8000/exams/${exam.id}/start`, {
+        method: "POST",
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      const attempt = await res.json();
+      if (!res.ok) {
+        setMessage(attempt.detail || "Sınav başlatılamadı.");
+        setOpen(true);
+        return;
+      }
+      if (attempt.deadline) {
+        duration = Math.max(0, Math.floor((Date.parse(attempt.deadline + "Z") - Date.now()) / 1000));
+      }
+      // Liste pencere açılmadan yüklendiyse sorular boştur; sınavı sunucudan tazele
+      const examRes = await fetch(`http://localhost:8000/exams/${exam.id}`);
+      exam = await examRes.json();
+      syncChanges();
+      if (!examRes.ok || exam.questions.length === 0) {
+        setMessage(exam.detail || "Sınav soruları yüklenemedi.");
+        setOpen(true);
+        return;
+      }
+    }
     setExamDialog({ open: true, exam });
     setAnswers(Array(exam.questions.length).fill(-1));
     setExamResult(null);
     setCurrentQ(0);
-    setTimeLeft(EXAM_DURATION);
+    setTimeLeft(duration);
+    setTotalTime(duration);
     if (timerRef.current) clearInterval(timerRef.current);
     timerRef.current = setInterval(() => {
       setTimeLeft((t) => {
@@ -154,6 +166,7 @@ function Exams({ user }) {
     setExamResult(null);
     setCurrentQ(0);
     setTimeLeft(EXAM_DURATION);
+    setTotalTime(EXAM_DURATION);
     if (timerRef.current) clearInterval(timerRef.current);
   };
 
@@ -169,10 +182,15 @@ function Exams({ user }) {
       body: JSON.stringify({ exam_id: examDialog.exam.id, answers }),
     });
     const data = await res.json();
-    setExamResult({ ...data, timeUsed: EXAM_DURATION - timeLeft, auto });
+    if (!res.ok) {
+      setMessage(data.detail || "Sınav gönderilemedi.");
+      setOpen(true);
+      return;
+    }
+    setExamResult({ ...data, timeUsed: totalTime - timeLeft, auto });
     setMessage("Sınav tamamlandı! Puanınız: " + data.score);
     setOpen(true);
-    fetchData();
+    syncChanges();
   };
 
   // Soruya şık seç
@@ -180,6 +198,17 @@ function Exams({ user }) {
     const newAns = [...answers];
     newAns[idx] = val;
     setAnswers(newAns);
+    // Süre dolarsa sunucu kaydedilen cevaplarla otomatik teslim eder
+    if (isTimed(examDialog.exam)) {
+      fetch(`http://localhost:8000/exams/${examDialog.exam.id}/answers`, {
+        method: "PUT",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+        body: JSON.stringify(newAns),
+      });
+    }
   };
 
   // Süreyi dakika:saniye formatında göster
@@ -345,7 +374,7 @@ function Exams({ user }) {
         <DialogContent>
           {examDialog.exam && (
             <Box sx={{ mb: 2 }}>
-              <LinearProgress variant="determinate" value={100 * timeLeft / EXAM_DURATION} sx={{ mb: 1 }} />
+              <LinearProgress variant="determinate" value={totalTime ? 100 * timeLeft / totalTime : 0} sx={{ mb: 1 }} />
               <Typography color={timeLeft < 60 ? 'error' : 'text.secondary'}>Kalan Süre: {formatTime(timeLeft)}</Typography>
             </Box>
           )}
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Button, Dialog, DialogTitle, DialogContent, DialogActions, TextField, IconButton, Box, Typography } from "@mui/material";
 import { Add, Edit, Delete } from "@mui/icons-material";
+import useChanges from "./useChanges";
 
 function Students({ user }) {
   const [students, setStudents] = useState([]);
@@ -11,17 +12,11 @@ function Students({ user }) {
 
   const token = user?.token;
 
-  const fetchStudents = () => {
-    fetch("http://localhost:8000/students", {
-      headers: { Authorization: `Bearer ${token}` },
-    })
-      .then((res) => res.json())
-      .then(setStudents);
-  };
+  const syncChanges = useChanges(token, { students: setStudents });
 
   useEffect(() => {
-    if (user?.role === "admin") fetchStudents();
-  }, [user]);
+    if (user?.role === "admin") syncChanges();
+  }, [user?.role, syncChanges]);
 
   const handleOpen = (student = null) => {
     setEditStudent(student);
@@ -53,7 +48,7 @@ function Students({ user }) {
         return res.json();
       })
       .then(() => {
-        fetchStudents();
+        syncChanges();
         handleClose();
       })
       .catch(setError);
@@ -67,7 +62,7 @@ function Students({ user }) {
     })
       .then((res) => {
         if (!res.ok) return res.json().then((d) => Promise.reject(d.detail || "Hata"));
-        fetchStudents();
+        syncChanges();
       })
       .catch(setError);
   };
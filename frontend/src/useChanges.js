@@ -0,0 +1,60 @@
+import { useCallback, useEffect, useRef } from "react";
+
+const API_URL = "http://localhost:8000";
+
+// Her türdeki kaydın kimliği; sonuçların sabit bir id alanı yok
+const KEYS = {
+  exams: (e) => e.id,
+  courses: (c) => c.id,
+  students: (s) => s.username,
+  results: (r) => `${r.username}:${r.exam_id}:${r.submitted_at}`,
+};
+
+// Son görülen sürümü (ve sunucu açılış kimliğini) saklar ve /changes ile yalnızca farkları uygular.
+// setters: { exams: setExams, results: setResults, ... }
+function useChanges(token, setters) {
+  const versionRef = useRef(null);
+  const epochRef = useRef(null);
+  const settersRef = useRef(setters);
+  settersRef.current = setters;
+  const types = Object.keys(setters).join(",");
+
+  useEffect(() => {
+    versionRef.current = null;
+    epochRef.current = null;
+  }, [token, types]);
+
+  return useCallback(async () => {
+    const params = new URLSearchParams({ types });
+    if (versionRef.current !== null) {
+      params.set("since", versionRef.current);
+      params.set("epoch", epochRef.current);
+    }
+    const res = await fetch(`${API_URL}/changes?${params}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) return;
+    const feed = await res.json();
+    const set = settersRef.current;
+    // Günlüğün gerisinde kalınan türler tam liste olarak gelir, diğerleri fark olarak
+    Object.entries(feed.data).forEach(([type, items]) => set[type]?.(items));
+    feed.changes.forEach((c) => {
+      const keyOf = KEYS[c.type];
+      if (!set[c.type]) return;
+      if (c.op === "delete") {
+        set[c.type]((prev) => prev.filter((item) => keyOf(item) !== c.key));
+      } else {
+        const key = keyOf(c.data);
+        set[c.type]((prev) =>
+          prev.some((item) => keyOf(item) === key)
+            ? prev.map((item) => (keyOf(item) === key ? c.data : item))
+            : [...prev, c.data]
+        );
+      }
+    });
+    versionRef.current = feed.version;
+    epochRef.current = feed.epoch;
+  }, [token, types]);
+}
+
+export default useChanges;